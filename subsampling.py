@@ -2,15 +2,18 @@ import csv
 from argparse import ArgumentParser
 from collections import defaultdict
 import os
-import random
-from scipy.stats import fisher_exact, mannwhitneyu
-from numpy import std
+import numpy as np
+from numba import njit, prange
+from scipy.stats import hypergeom, mannwhitneyu
 from datetime import date
 
 DEFECTS_TO_INVESTIGATE = ['intact', '5defect', 'hypermutated']
+READ_BUFFER_SIZE = 8 * 1024 * 1024
 
 
 class Sequence:
+    __slots__ = ('clone_id', 'defect', 'date')
+
     def __init__(self, clone_id, defect, date=None):
         self.clone_id = clone_id
         self.defect = defect
@@ -18,12 +21,55 @@ class Sequence:
 
 
 class SequenceList:
-    def __init__(self):
-        self.sequences = []
+    """ Sequences stored as parallel arrays: clone_ids and defect_codes index into the
+    clone_names and defect_names tables, dates holds ordinals (0 for undated sequences) """
+    def __init__(self, clone_names=None, defect_names=None):
+        self.clone_names = [] if clone_names is None else clone_names
+        self.defect_names = [] if defect_names is None else defect_names
+        self._defect_to_int = {defect: code for code, defect in enumerate(self.defect_names)}
+        self._clone_ids = np.empty(0, dtype=np.int32)
+        self._defect_codes = np.empty(0, dtype=np.int8)
+        self._dates = np.empty(0, dtype=np.int64)
+        self._sorted_dates = None
+        self._distinct_ids = None
+        self._initial_clone_ids = []
+        self._initial_defect_codes = []
+        self._initial_dates = []
+        self._initial_frequencies = []
         self.unique_counter = 0
         self.clone_counter = 0
         self.distinct_counter = 0
-        self.clone_sizes = defaultdict(lambda: 0)
+        self.clone_sizes = defaultdict(int)
+        self._seen_clone_ids = set()
+
+    @property
+    def clone_ids(self):
+        self._store_initial_sequences()
+        return self._clone_ids
+
+    @property
+    def defect_codes(self):
+        self._store_initial_sequences()
+        return self._defect_codes
+
+    @property
+    def dates(self):
+        self._store_initial_sequences()
+        return self._dates
+
+    @property
+    def sequences(self):
+        """ The sequences as Sequence objects, resolved through the name tables """
+        return [Sequence(self.clone_names[clone_id],
+                         self.defect_names[defect_code] if defect_code >= 0 else None,
+                         date.fromordinal(day) if day else None)
+                for clone_id, defect_code, day in zip(self.clone_ids.tolist(),
+                                                      self.defect_codes.tolist(),
+                                                      self.dates.tolist())]
+
+    def get_defect_code(self, defect):
+        """ Integer code of defect, or -1 if no sequence has that defect """
+        return self._defect_to_int.get(defect, -1)
 
     def add_initial_sequence(self, clone_id, defect, frequency, date=None):
         if clone_id == 'unique':
@@ -32,215 +78,311 @@ class SequenceList:
             assert frequency == 1
         else:
             # this is a clone we haven't seen yet, it should have a unique id
-            assert clone_id not in [sequence.clone_id for sequence in self.sequences]
+            assert clone_id not in self._seen_clone_ids
             self.clone_counter += 1
-        for i in range(0, frequency):
-            self.sequences.append(Sequence(clone_id, defect, date))
+        self._seen_clone_ids.add(clone_id)
+        clone_int = len(self.clone_names)
+        self.clone_names.append(clone_id)
+        if defect not in self._defect_to_int:
+            self._defect_to_int[defect] = len(self.defect_names)
+            self.defect_names.append(defect)
+        # one entry per distinct sequence, expanded to frequency copies in _store_initial_sequences
+        self._initial_clone_ids.append(clone_int)
+        self._initial_defect_codes.append(self._defect_to_int[defect])
+        self._initial_dates.append(date.toordinal() if date is not None else 0)
+        self._initial_frequencies.append(frequency)
+        self._sorted_dates = None
+        self._distinct_ids = None
         self.distinct_counter += 1
 
-    def add_many_sequences(self, sequence_list):
-        self.sequences = sequence_list
-        distinct_sequences = {sequence.clone_id for sequence in sequence_list}
-        self.distinct_counter = len(distinct_sequences)
-        counted_clones = set()
-        for clone_id in distinct_sequences:
-            sequences_this_id = [sequence for sequence in sequence_list if sequence.clone_id == clone_id]
-            clone_size = len(sequences_this_id)
-            self.clone_sizes[clone_size] += 1
-            if clone_size == 1:
-                self.unique_counter += 1
-            elif clone_id not in counted_clones:
-                self.clone_counter += 1
-                counted_clones.add(clone_id)
-
-    def add_many_sequences_to_existing(self, sequence_list):
-        self.sequences = self.sequences + sequence_list
-        distinct_sequences = {sequence.clone_id for sequence in self.sequences}
-        self.distinct_counter = len(distinct_sequences)
+    def _store_initial_sequences(self):
+        if not self._initial_clone_ids:
+            return
+        frequencies = np.asarray(self._initial_frequencies)
+        self._clone_ids = np.concatenate([self._clone_ids,
+                                          np.repeat(np.asarray(self._initial_clone_ids, dtype=np.int32),
+                                                    frequencies)])
+        self._defect_codes = np.concatenate([self._defect_codes,
+                                             np.repeat(np.asarray(self._initial_defect_codes, dtype=np.int8),
+                                                       frequencies)])
+        self._dates = np.concatenate([self._dates,
+                                      np.repeat(np.asarray(self._initial_dates, dtype=np.int64), frequencies)])
+        self._initial_clone_ids = []
+        self._initial_defect_codes = []
+        self._initial_dates = []
+        self._initial_frequencies = []
+
+    @staticmethod
+    def _as_arrays(clone_ids, defect_codes, dates):
+        defect_codes = np.full(len(clone_ids), -1) if defect_codes is None else defect_codes
+        dates = np.zeros(len(clone_ids)) if dates is None else dates
+        return (np.asarray(clone_ids, dtype=np.int32),
+                np.asarray(defect_codes, dtype=np.int8),
+                np.asarray(dates, dtype=np.int64))
+
+    def add_many_sequences(self, clone_ids, defect_codes=None, dates=None):
+        self._store_initial_sequences()
+        self._clone_ids, self._defect_codes, self._dates = self._as_arrays(clone_ids, defect_codes, dates)
+        self._sorted_dates = None
+        self._distinct_ids = None
+        counts = np.bincount(self._clone_ids, minlength=len(self.clone_names))
+        counts = counts[counts > 0]
+        self.distinct_counter = len(counts)
+        self.unique_counter += int((counts == 1).sum())
+        self.clone_counter += int((counts > 1).sum())
+        clone_sizes, num_clones = np.unique(counts, return_counts=True)
+        for clone_size, number in zip(clone_sizes.tolist(), num_clones.tolist()):
+            self.clone_sizes[clone_size] += number
+
+    def add_many_sequences_to_existing(self, clone_ids, defect_codes=None, dates=None):
+        clone_ids, defect_codes, dates = self._as_arrays(clone_ids, defect_codes, dates)
+        if self._distinct_ids is None:
+            # mask over clone_names of the ids present, kept up to date as sequences are added
+            self._distinct_ids = np.zeros(len(self.clone_names), dtype=bool)
+            self._distinct_ids[self.clone_ids] = True
+        new_ids = np.unique(clone_ids[~self._distinct_ids[clone_ids]])
+        self._distinct_ids[new_ids] = True
+        self.distinct_counter += len(new_ids)
+        self._clone_ids = np.concatenate([self.clone_ids, clone_ids])
+        self._defect_codes = np.concatenate([self.defect_codes, defect_codes])
+        self._dates = np.concatenate([self.dates, dates])
+        self._sorted_dates = None
+
+    def subset(self, mask):
+        """ New SequenceList of the sequences selected by mask, sharing the name tables """
+        subset = SequenceList(self.clone_names, self.defect_names)
+        subset.add_many_sequences(self.clone_ids[mask], self.defect_codes[mask], self.dates[mask])
+        return subset
 
     def print_totals(self, identifier):
-        print(f"{identifier}: total {len(self.sequences)}, distinct {self.distinct_counter}, "
+        print(f"{identifier}: total {len(self.clone_ids)}, distinct {self.distinct_counter}, "
               f"unique {self.unique_counter}, distinct clones {self.clone_counter}")
 
     def get_median_date(self):
-        dates = [sequence.date for sequence in self.sequences]
-        dates.sort()
-        length = len(dates)
-        if len(dates) % 2 == 0:
-            left = dates[int(length/2)]  # python rounds down for 0.5
-            right = dates[int(length/2) + 1]
-            return left + (right - left)/2
+        length = len(self.dates)
+        middle = length // 2
+        if length % 2 == 0:
+            dates = np.partition(self.dates, (middle - 1, middle))
+            left = dates[middle - 1]
+            right = dates[middle]
+            return date.fromordinal(int(left + (right - left)/2))
         else:
-            return dates[int(length/2)]
+            return date.fromordinal(int(np.partition(self.dates, middle)[middle]))
 
     def get_median_date_of_distinct_sequences(self):
-        dates = self.get_dates()
-        dates.sort()
+        return date.fromordinal(self.get_median_ordinal_of_distinct_sequences())
+
+    def get_median_ordinal_of_distinct_sequences(self):
+        dates = self.get_dates()  # already sorted
         length = len(dates)
-        if len(dates) % 2 == 0:
-            left = dates[int(length/2)]  # python rounds down for 0.5
-            right = dates[int(length/2) + 1]
-            return date.fromordinal(int(left + (right - left)/2))
+        middle = length // 2
+        if length % 2 == 0:
+            left = dates[middle - 1]
+            right = dates[middle]
+            return int(left + (right - left)/2)
         else:
-            return date.fromordinal(dates[int(length/2)])
+            return int(dates[middle])
 
     def get_dates(self):
-        sampled_ids = set()
-        dates = []
-        for sequence in self.sequences:
-            if sequence.clone_id in sampled_ids:
-                continue
-            else:
-                sampled_ids.add(sequence.clone_id)
-                dates.append(sequence.date.toordinal())
-        return dates
+        """ Sorted date ordinals of the first sequence of each distinct clone, as a read-only array
+        cached until the sequences change """
+        if self._sorted_dates is None:
+            _, first_indices = np.unique(self.clone_ids, return_index=True)
+            self._sorted_dates = np.sort(self.dates[first_indices])
+            self._sorted_dates.flags.writeable = False
+        return self._sorted_dates
 
 
 def get_defect_stats(sequences, defect):
-    sequences_this_defect = SequenceList()
-    sequences_this_defect.add_many_sequences([sequence for sequence in sequences if sequence.defect == defect])
-    other_sequences = SequenceList()
-    other_sequences.add_many_sequences([sequence for sequence in sequences if sequence.defect != defect])
+    is_defect = sequences.defect_codes == sequences.get_defect_code(defect)
+    sequences_this_defect = sequences.subset(is_defect)
+    other_sequences = sequences.subset(~is_defect)
     sequences_this_defect.print_totals(defect)
     other_sequences.print_totals(identifier=f"NOT {defect}")
     return sequences_this_defect, other_sequences
 
 
 def read_data(datafile):
-    reader = csv.DictReader(datafile)
+    reader = csv.reader(datafile)
+    header = next(reader)
+    clonality = header.index('clonality')
+    genomic_integrity = header.index('genomicIntegrity')
+    frequency = header.index('frequency')
     all_sequences = SequenceList()
     for row in reader:
-        all_sequences.add_initial_sequence(clone_id=row['clonality'],
-                                           defect=row['genomicIntegrity'],
-                                           frequency=int(row['frequency']))
+        if not row:
+            continue
+        all_sequences.add_initial_sequence(clone_id=row[clonality],
+                                           defect=row[genomic_integrity],
+                                           frequency=int(row[frequency]))
     return all_sequences
 
 
 def read_dates_data(datafile):
-    reader = csv.DictReader(datafile)
+    reader = csv.reader(datafile)
+    header = next(reader)
+    comparison = header.index('comparison')
+    clonality = header.index('clonality')
+    query = header.index('query')
+    frequency = header.index('frequency')
+    sampling_date = header.index('date')
     all_sequences = defaultdict(lambda: SequenceList())
     for row in reader:
-        person = row['comparison']
-        all_sequences[person].add_initial_sequence(clone_id=row['clonality'],
-                                                   defect=row['query'],
-                                                   frequency=int(row['frequency']),
-                                                   date=date.fromisoformat(row['date']))
+        if not row:
+            continue
+        person = row[comparison]
+        all_sequences[person].add_initial_sequence(clone_id=row[clonality],
+                                                   defect=row[query],
+                                                   frequency=int(row[frequency]),
+                                                   date=date.fromisoformat(row[sampling_date]))
     return all_sequences
 
 
-def add_all_data(all_stats, num_unique, num_clonal, odds_ratio, p_value):
-    all_stats['unique'].append(num_unique)
-    all_stats['clonal'].append(num_clonal)
-    all_stats['odds_ratio'].append(odds_ratio)
-    all_stats['p_value'].append(p_value)
-
-
 def calculate_stats(all_stats):
-    means = []
-    standard_deviations = []
-    for entry in all_stats.values():
-        means.append(sum(entry)/len(entry))
-        standard_deviations.append(std(entry))
+    means = [float(entry.mean()) for entry in all_stats.values()]
+    standard_deviations = [float(entry.std()) for entry in all_stats.values()]
     return means, standard_deviations
 
 
-def do_subsampling(defect_seqs, sequences, outfile, num_replicas=100):
+@njit(parallel=True, cache=True)
+def replicate(clone_ids, num_clones, sampling_depth, num_replicas, seed, out_unique, out_clonal):
+    """ Draw num_replicas samples of sampling_depth sequences with replacement, writing the number
+    of unique and clonal ids of each sample to out_unique and out_clonal. Replica i is drawn from
+    its own stream seeded with seed + i, so the results do not depend on the number of threads """
+    for i in prange(num_replicas):
+        np.random.seed((seed + i) % 2**32)
+        counts = np.zeros(num_clones, np.int32)
+        for _ in range(sampling_depth):
+            counts[clone_ids[np.random.randint(0, len(clone_ids))]] += 1
+        unique = 0
+        clonal = 0
+        for count in counts:
+            if count == 1:
+                unique += 1
+            elif count > 1:
+                clonal += 1
+        out_unique[i] = unique
+        out_clonal[i] = clonal
+
+
+def fast_fisher_2x2(a, b, c, d):
+    """ Two-sided Fisher's exact test of the tables [[a, b], [c, d]], vectorised over arrays of counts.
+    Returns the odds ratios and p-values as scipy.stats.fisher_exact would for each table.
+    The one-sided shortcut hypergeom.sf(a - 1) would be cheaper, but only gives the upper tail,
+    so both tails are kept to match the two-sided test reported in the output """
+    a, b, c, d = np.broadcast_arrays(*(np.asarray(count, dtype=np.int64) for count in (a, b, c, d)))
+    total = a + b + c + d
+    row_total = a + b
+    column_total = a + c
+    with np.errstate(divide='ignore', invalid='ignore'):
+        odds_ratio = np.where((b > 0) & (c > 0), a * d / (b * c), np.inf)
+        distribution = hypergeom(total, row_total, column_total)
+        mode = (column_total + 1) * (row_total + 1) // (total + 2)
+        pmf_observed = distribution.pmf(a)
+        pmf_mode = distribution.pmf(mode)
+        threshold = pmf_observed * (1 + 1e-14)
+        # bisect for the edge of the tail on the other side of the mode: the first value past the mode
+        # whose pmf does not exceed that of a, starting from the ends of the support
+        below_mode = a < mode
+        lower = np.where(below_mode, mode, np.maximum(0, column_total - total + row_total) - 1)
+        upper = np.where(below_mode, np.minimum(row_total, column_total) + 1, mode)
+        while np.any(upper - lower > 1):
+            active = upper - lower > 1
+            middle = (lower + upper) // 2
+            in_tail = distribution.pmf(middle) <= threshold
+            upper = np.where(active & (in_tail == below_mode), middle, upper)
+            lower = np.where(active & (in_tail != below_mode), middle, lower)
+        p_value = np.where(below_mode,
+                           distribution.cdf(a) + distribution.sf(upper - 1),
+                           distribution.sf(a - 1) + distribution.cdf(lower))
+        at_mode = np.abs(pmf_observed - pmf_mode) / np.maximum(pmf_observed, pmf_mode) <= 1e-14
+    p_value = np.minimum(np.where(at_mode, 1.0, p_value), 1.0)
+    # if both values in a row or column are zero, the p-value is 1 and the odds ratio is NaN
+    empty_margin = (row_total == 0) | (c + d == 0) | (column_total == 0) | (b + d == 0)
+    odds_ratio = np.where(empty_margin, np.nan, odds_ratio)
+    p_value = np.where(empty_margin, 1.0, p_value)
+    return odds_ratio, p_value
+
+
+def do_subsampling(defect_seqs, sequences, outfile, num_replicas=100, seed=None):
     """ Subsample sequences to the same depth as defect_seqs """
-    sampling_depth = len(defect_seqs.sequences)
+    if seed is None:
+        seed = np.random.SeedSequence().generate_state(1)[0]
+    sampling_depth = len(defect_seqs.clone_ids)
     defect_unique = defect_seqs.unique_counter
     defect_clonal = defect_seqs.clone_counter
     columns = ["iteration", "unique", "clones", "odds_ratio", "p_value"]
-    all_stats = defaultdict(lambda: [])
-    writer = csv.DictWriter(outfile, columns)
-    writer.writeheader()
-    for i in range(0, num_replicas):
-        sampled_seqs = random.choices(sequences.sequences, k=sampling_depth)
-        sampled_sequences = SequenceList()
-        sampled_sequences.add_many_sequences(sampled_seqs)
-        sampled_unique = sampled_sequences.unique_counter
-        sampled_clonal = sampled_sequences.clone_counter
-        table = [[defect_clonal, sampled_clonal], [defect_unique, sampled_unique]]
-        stats = fisher_exact(table)
-        row = {"iteration": i+1,
-               "unique": sampled_unique,
-               "clones": sampled_clonal,
-               "odds_ratio": stats.statistic,
-               "p_value": stats.pvalue}
-        writer.writerow(row)
-        add_all_data(all_stats, sampled_unique, sampled_clonal, stats.statistic, stats.pvalue)
+    all_unique = np.empty(num_replicas, dtype=np.int64)
+    all_clonal = np.empty(num_replicas, dtype=np.int64)
+    replicate(sequences.clone_ids, len(sequences.clone_names), sampling_depth, num_replicas, int(seed),
+              all_unique, all_clonal)
+    all_odds_ratios, all_p_values = fast_fisher_2x2(defect_clonal, all_clonal, defect_unique, all_unique)
+    all_stats = {'unique': all_unique,
+                 'clonal': all_clonal,
+                 'odds_ratio': all_odds_ratios,
+                 'p_value': all_p_values}
     means, standard_deviations = calculate_stats(all_stats)
-    row = {"iteration": 'averages',
-           "unique": means[0],
-           "clones": means[1],
-           "odds_ratio": means[2],
-           "p_value": means[3]}
-    writer.writerow(row)
-    row = {"iteration": 'standard deviations',
-           "unique": standard_deviations[0],
-           "clones": standard_deviations[1],
-           "odds_ratio": standard_deviations[2],
-           "p_value": standard_deviations[3]}
-    writer.writerow(row)
-
-
-def do_subsampling_dates(defect_seqs, sequences, outfile, num_replicas=100):
+    writer = csv.writer(outfile)
+    writer.writerow(columns)
+    writer.writerows(zip(range(1, num_replicas + 1), all_unique.tolist(), all_clonal.tolist(),
+                         all_odds_ratios.tolist(), all_p_values.tolist()))
+    writer.writerow(['averages'] + means)
+    writer.writerow(['standard deviations'] + standard_deviations)
+
+
+def do_subsampling_dates(defect_seqs, sequences, outfile, num_replicas=100, seed=None):
     """ Subsample sequences to the same depth of distinct sequences as defect_seqs """
+    rng = np.random.default_rng(seed)
     sampling_depth = defect_seqs.distinct_counter
     print(f"Sampling to depth {sampling_depth}")
     sampled_median = defect_seqs.get_median_date_of_distinct_sequences()
     sampled_dates = defect_seqs.get_dates()
     columns = ["iteration", "median date", "p_value"]
-    writer = csv.DictWriter(outfile, columns)
-    writer.writeheader()
-    average_median_date = 0
-    average_p = 0
+    median_dates = np.empty(num_replicas, dtype=np.int64)
+    p_values = np.empty(num_replicas, dtype=np.float64)
     for i in range(num_replicas):
-        sampled_sequences = SequenceList()
+        sampled_sequences = SequenceList(sequences.clone_names, sequences.defect_names)
         while sampled_sequences.distinct_counter < sampling_depth:
             number_missing = sampling_depth - sampled_sequences.distinct_counter
-            new_seqs = random.choices(sequences.sequences, k=number_missing)
-            sampled_sequences.add_many_sequences_to_existing(new_seqs)
+            sampled_indices = rng.integers(0, len(sequences.clone_ids), size=number_missing, dtype=np.int32)
+            sampled_sequences.add_many_sequences_to_existing(sequences.clone_ids[sampled_indices],
+                                                             dates=sequences.dates[sampled_indices])
         subsampled_dates = sampled_sequences.get_dates()
         mann_whitney = mannwhitneyu(sampled_dates, subsampled_dates)
-        row = {"iteration": i+1,
-               "median date": sampled_sequences.get_median_date_of_distinct_sequences(),
-               "p_value": mann_whitney.pvalue}
-        writer.writerow(row)
-        average_median_date += sampled_sequences.get_median_date_of_distinct_sequences().toordinal()
-        average_p += mann_whitney.pvalue
-    average_median_date = date.fromordinal(int(average_median_date/num_replicas))
-    average_p /= num_replicas
-    row = {'iteration': 'Average',
-           'median date': average_median_date,
-           'p_value': average_p}
-    writer.writerow(row)
-    row = {'iteration': 'Comparison group',
-           'median date': sampled_median,
-           'p_value': ''}
-    writer.writerow(row)
-
-
-def defect_based_subsampling(file, outfolder, N):
-    with open(file, 'r') as datafile:
+        median_dates[i] = sampled_sequences.get_median_ordinal_of_distinct_sequences()
+        p_values[i] = mann_whitney.pvalue
+    rows = [(i+1, date.fromordinal(median_date), p_value)
+            for i, (median_date, p_value) in enumerate(zip(median_dates.tolist(), p_values.tolist()))]
+    rows.append(('Average', date.fromordinal(int(median_dates.mean())), float(p_values.mean())))
+    rows.append(('Comparison group', sampled_median, ''))
+    writer = csv.writer(outfile)
+    writer.writerow(columns)
+    writer.writerows(rows)
+
+
+def defect_based_subsampling(file, outfolder, N, seed=None):
+    with open(file, 'r', buffering=READ_BUFFER_SIZE, newline='') as datafile:
         all_sequences = read_data(datafile)
 
     all_sequences.print_totals(identifier='ALL')
 
-    for defect in DEFECTS_TO_INVESTIGATE:
-        seq_defect, seq_other = get_defect_stats(all_sequences.sequences, defect)
+    seeds = np.random.SeedSequence(seed).generate_state(len(DEFECTS_TO_INVESTIGATE))
+    for defect, defect_seed in zip(DEFECTS_TO_INVESTIGATE, seeds):
+        seq_defect, seq_other = get_defect_stats(all_sequences, defect)
         with open(os.path.join(outfolder, f"{defect}_subsampling.csv"), 'w') as outfile:
-            do_subsampling(seq_defect, seq_other, outfile, N)
+            do_subsampling(seq_defect, seq_other, outfile, N, int(defect_seed))
 
 
-def date_based_subsampling(file, outfolder, N):
-    with open(file, 'r') as datafile:
+def date_based_subsampling(file, outfolder, N, seed=None):
+    with open(file, 'r', buffering=READ_BUFFER_SIZE, newline='') as datafile:
         all_sequences = read_dates_data(datafile)
 
-    for person, sequences in all_sequences.items():
+    seeds = np.random.SeedSequence(seed).spawn(len(all_sequences))
+    for (person, sequences), person_seed in zip(all_sequences.items(), seeds):
         sequences.print_totals(identifier=f'Person {person}')
-        seq_og, seq_subsample = get_defect_stats(sequences.sequences, '0')
+        seq_og, seq_subsample = get_defect_stats(sequences, '0')
         with open(os.path.join(outfolder, f"person_{person}_subsampling.csv"), 'w') as outfile:
-            do_subsampling_dates(seq_og, seq_subsample, outfile, N)
+            do_subsampling_dates(seq_og, seq_subsample, outfile, N, person_seed)
 
 
 
@@ -250,14 +392,16 @@ def main():
     parser.add_argument('datafile', help='File containing the full set of data')
     parser.add_argument('outfolder', help='Folder to write outputs to')
     parser.add_argument('-N', help='Number of replicas to sample', default=100)
+    parser.add_argument('--seed', help='Seed for the random number generator, for reproducible output', default=None)
     args = parser.parse_args()
 
     os.mkdir(args.outfolder)
 
+    seed = int(args.seed) if args.seed is not None else None
     if args.mode == 'defect':
-        defect_based_subsampling(args.datafile, args.outfolder, int(args.N))
+        defect_based_subsampling(args.datafile, args.outfolder, int(args.N), seed)
     elif args.mode == 'dates':
-        date_based_subsampling(args.datafile, args.outfolder, int(args.N))
+        date_based_subsampling(args.datafile, args.outfolder, int(args.N), seed)
 
 
 if __name__ == '__main__':
@@ -1,5 +1,11 @@
+import io
+from datetime import date
 import unittest
-from subsampling import SequenceList, Sequence
+import numba
+import numpy as np
+from scipy.stats import fisher_exact
+from subsampling import SequenceList, Sequence, replicate, fast_fisher_2x2, read_data, read_dates_data, \
+    get_defect_stats
 
 
 def assert_sequences_equal(sequences1, sequences2):
@@ -85,12 +91,9 @@ class AddSeqListTests(unittest.TestCase):
 
     def test_add_all_unique(self):
         seq_list = self.sequences
-        sequences = [Sequence('unique1', 'intact'),
-                     Sequence('unique2', 'intact'),
-                     Sequence('unique3', 'intact'),
-                     Sequence('unique4', 'intact')]
-        seq_list.add_many_sequences(sequences)
-        assert_sequences_equal(sequences, seq_list.sequences)
+        clone_ids = np.array([0, 1, 2, 3])
+        seq_list.add_many_sequences(clone_ids)
+        np.testing.assert_array_equal(clone_ids, seq_list.clone_ids)
         assert seq_list.unique_counter == 4
         assert seq_list.clone_counter == 0
         assert seq_list.distinct_counter == 4
@@ -98,12 +101,9 @@ class AddSeqListTests(unittest.TestCase):
 
     def test_add_one_clone(self):
         seq_list = self.sequences
-        sequences = [Sequence('clone1', 'intact'),
-                     Sequence('clone1', 'intact'),
-                     Sequence('clone1', 'intact'),
-                     Sequence('clone1', 'intact')]
-        seq_list.add_many_sequences(sequences)
-        assert_sequences_equal(sequences, seq_list.sequences)
+        clone_ids = np.array([0, 0, 0, 0])
+        seq_list.add_many_sequences(clone_ids)
+        np.testing.assert_array_equal(clone_ids, seq_list.clone_ids)
         assert seq_list.unique_counter == 0
         assert seq_list.clone_counter == 1
         assert seq_list.distinct_counter == 1
@@ -111,16 +111,11 @@ class AddSeqListTests(unittest.TestCase):
 
     def test_add_unique_and_clonal(self):
         seq_list = self.sequences
-        sequences = [Sequence('clone1', 'intact'),
-                     Sequence('unique1', 'intact'),
-                     Sequence('clone1', 'intact'),
-                     Sequence('clone2', 'hypermutated'),
-                     Sequence('clone1', 'intact'),
-                     Sequence('clone2', 'hypermutated'),
-                     Sequence('unique3', '5defect'),
-                     Sequence('clone1', 'intact')]
-        seq_list.add_many_sequences(sequences)
-        assert_sequences_equal(sequences, seq_list.sequences)
+        clone_ids = np.array([0, 3, 0, 1, 0, 1, 4, 0])
+        defect_codes = np.array([0, 0, 0, 2, 0, 2, 1, 0])
+        seq_list.add_many_sequences(clone_ids, defect_codes)
+        np.testing.assert_array_equal(clone_ids, seq_list.clone_ids)
+        np.testing.assert_array_equal(defect_codes, seq_list.defect_codes)
         assert seq_list.unique_counter == 2
         assert seq_list.clone_counter == 2
         assert seq_list.distinct_counter == 4
@@ -128,10 +123,9 @@ class AddSeqListTests(unittest.TestCase):
 
     def test_unique_becomes_clone(self):
         seq_list = self.sequences
-        sequences = [Sequence('unique1', 'intact'),
-                     Sequence('unique1', 'intact')]
-        seq_list.add_many_sequences(sequences)
-        assert_sequences_equal(sequences, seq_list.sequences)
+        clone_ids = np.array([2, 2])
+        seq_list.add_many_sequences(clone_ids)
+        np.testing.assert_array_equal(clone_ids, seq_list.clone_ids)
         assert seq_list.unique_counter == 0
         assert seq_list.clone_counter == 1
         assert seq_list.distinct_counter == 1
@@ -139,14 +133,183 @@ class AddSeqListTests(unittest.TestCase):
 
     def test_clone_becomes_unique(self):
         seq_list = self.sequences
-        sequences = [Sequence('clone1', 'intact')]
-        seq_list.add_many_sequences(sequences)
-        assert_sequences_equal(sequences, seq_list.sequences)
+        clone_ids = np.array([0])
+        seq_list.add_many_sequences(clone_ids)
+        np.testing.assert_array_equal(clone_ids, seq_list.clone_ids)
         assert seq_list.unique_counter == 1
         assert seq_list.clone_counter == 0
         assert seq_list.distinct_counter == 1
         self.assertDictEqual(seq_list.clone_sizes, {1: 1})
 
+    def test_add_to_existing(self):
+        seq_list = SequenceList(clone_names=['clone1', 'clone2', 'unique0', 'unique1'])
+        seq_list.add_many_sequences_to_existing(np.array([0, 2, 0]))
+        assert seq_list.distinct_counter == 2
+        seq_list.add_many_sequences_to_existing(np.array([2, 3, 3, 1]))
+        np.testing.assert_array_equal(seq_list.clone_ids, [0, 2, 0, 2, 3, 3, 1])
+        assert seq_list.distinct_counter == 4
+
+    def test_subset_shares_names(self):
+        seq_list = self.sequences
+        seq_list.add_initial_sequence('unique', '5defect', 1)
+        seq_list.add_initial_sequence('clone1', 'intact', 5)
+        seq_list.add_initial_sequence('unique', 'hypermutated', 1)
+        subset = seq_list.subset(seq_list.defect_codes != seq_list.get_defect_code('intact'))
+        expected_seq_list = [Sequence('unique0', '5defect'),
+                             Sequence('unique1', 'hypermutated')]
+        assert_sequences_equal(expected_seq_list, subset.sequences)
+        assert subset.unique_counter == 2
+        assert subset.clone_counter == 0
+        assert subset.distinct_counter == 2
+
+
+class ReplicateTests(unittest.TestCase):
+    def test_single_clone(self):
+        clone_ids = np.zeros(5, dtype=np.int32)
+        out_unique = np.empty(3, dtype=np.int64)
+        out_clonal = np.empty(3, dtype=np.int64)
+        replicate(clone_ids, 1, 4, 3, 0, out_unique, out_clonal)
+        np.testing.assert_array_equal(out_unique, [0, 0, 0])
+        np.testing.assert_array_equal(out_clonal, [1, 1, 1])
+
+    def test_depth_one(self):
+        clone_ids = np.array([0, 1, 1, 2], dtype=np.int32)
+        out_unique = np.empty(3, dtype=np.int64)
+        out_clonal = np.empty(3, dtype=np.int64)
+        replicate(clone_ids, 3, 1, 3, 0, out_unique, out_clonal)
+        np.testing.assert_array_equal(out_unique, [1, 1, 1])
+        np.testing.assert_array_equal(out_clonal, [0, 0, 0])
+
+    def test_seeded_replicas_do_not_depend_on_threads(self):
+        clone_ids = np.array([0, 0, 1, 2, 2, 2, 3, 4, 5, 5], dtype=np.int32)
+        results = []
+        for num_threads in (1, numba.config.NUMBA_NUM_THREADS):
+            numba.set_num_threads(num_threads)
+            try:
+                out_unique = np.empty(20, dtype=np.int64)
+                out_clonal = np.empty(20, dtype=np.int64)
+                replicate(clone_ids, 6, 6, 20, 1234, out_unique, out_clonal)
+            finally:
+                numba.set_num_threads(numba.config.NUMBA_NUM_THREADS)
+            results.append((out_unique, out_clonal))
+        np.testing.assert_array_equal(results[0][0], results[1][0])
+        np.testing.assert_array_equal(results[0][1], results[1][1])
+
+
+class FastFisherTests(unittest.TestCase):
+    def test_matches_scipy(self):
+        tables = np.array([[285, 902, 454, 1359],
+                           [3, 40, 20, 10],
+                           [10, 0, 5, 7],
+                           [0, 0, 5, 7],
+                           [8, 8, 8, 8]])
+        odds_ratios, p_values = fast_fisher_2x2(*tables.T)
+        for (a, b, c, d), odds_ratio, p_value in zip(tables, odds_ratios, p_values):
+            expected = fisher_exact([[a, b], [c, d]])
+            np.testing.assert_equal(odds_ratio, expected.statistic)
+            self.assertAlmostEqual(p_value, expected.pvalue, places=12)
+
+    def test_large_margins(self):
+        rng = np.random.default_rng(0)
+        b = rng.integers(8000, 10000, 100)
+        d = rng.integers(13000, 14000, 100)
+        odds_ratios, p_values = fast_fisher_2x2(2850, b, 4540, d)
+        for b_i, d_i, odds_ratio, p_value in zip(b[:10], d[:10], odds_ratios, p_values):
+            expected = fisher_exact([[2850, b_i], [4540, d_i]])
+            self.assertAlmostEqual(odds_ratio, expected.statistic, places=12)
+            self.assertAlmostEqual(p_value, expected.pvalue, places=12)
+
+
+class ReadDataTests(unittest.TestCase):
+    def test_read_data(self):
+        datafile = io.StringIO("frequency,genomicIntegrity,clonality\n"
+                               "1,5defect,unique\n"
+                               "3,intact,clone1\n"
+                               "1,intact,unique\n")
+        seq_list = read_data(datafile)
+        expected_seq_list = [Sequence('unique0', '5defect')] + \
+                            [Sequence('clone1', 'intact')] * 3 + \
+                            [Sequence('unique1', 'intact')]
+        assert_sequences_equal(expected_seq_list, seq_list.sequences)
+        assert seq_list.unique_counter == 2
+        assert seq_list.clone_counter == 1
+        assert seq_list.distinct_counter == 3
+
+    def test_skips_blank_lines(self):
+        datafile = io.StringIO("frequency,genomicIntegrity,clonality\n"
+                               "1,5defect,unique\n"
+                               "\n"
+                               "3,intact,clone1\n"
+                               "\n")
+        seq_list = read_data(datafile)
+        expected_seq_list = [Sequence('unique0', '5defect')] + [Sequence('clone1', 'intact')] * 3
+        assert_sequences_equal(expected_seq_list, seq_list.sequences)
+        assert seq_list.distinct_counter == 2
+
+    def test_dates_skips_blank_lines(self):
+        datafile = io.StringIO("comparison,clonality,query,frequency,date\n"
+                               "A,unique,0,1,2015-06-01\n"
+                               "A,clone1,1,2,2012-01-01\n"
+                               "\n")
+        all_sequences = read_dates_data(datafile)
+        assert list(all_sequences) == ['A']
+        assert len(all_sequences['A'].clone_ids) == 3
+        assert all_sequences['A'].distinct_counter == 2
+
+
+class DefectStatsTests(unittest.TestCase):
+    def test_split_by_defect(self):
+        seq_list = SequenceList()
+        seq_list.add_initial_sequence('unique', '5defect', 1)
+        seq_list.add_initial_sequence('clone1', 'intact', 5)
+        seq_list.add_initial_sequence('unique', 'intact', 1)
+        seq_list.add_initial_sequence('clone2', 'hypermutated', 2)
+        seq_defect, seq_other = get_defect_stats(seq_list, 'intact')
+        assert_sequences_equal([Sequence('clone1', 'intact')] * 5 + [Sequence('unique1', 'intact')],
+                               seq_defect.sequences)
+        assert_sequences_equal([Sequence('unique0', '5defect')] + [Sequence('clone2', 'hypermutated')] * 2,
+                               seq_other.sequences)
+        assert (seq_defect.unique_counter, seq_defect.clone_counter) == (1, 1)
+        assert (seq_other.unique_counter, seq_other.clone_counter) == (1, 1)
+        self.assertDictEqual(seq_defect.clone_sizes, {1: 1, 5: 1})
+        self.assertDictEqual(seq_other.clone_sizes, {1: 1, 2: 1})
+
+    def test_missing_defect(self):
+        seq_list = SequenceList()
+        seq_list.add_initial_sequence('clone1', 'intact', 5)
+        seq_defect, seq_other = get_defect_stats(seq_list, 'hypermutated')
+        assert len(seq_defect.clone_ids) == 0
+        assert len(seq_other.clone_ids) == 5
+
+
+class DatesTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.sequences = SequenceList()
+        self.sequences.add_initial_sequence('clone1', '0', 3, date(2015, 6, 1))
+        self.sequences.add_initial_sequence('unique', '0', 1, date(2012, 1, 1))
+        self.sequences.add_initial_sequence('unique', '1', 1, date(2019, 3, 5))
+
+    def test_dates_of_distinct_sequences(self):
+        dates = [date(2012, 1, 1).toordinal(), date(2015, 6, 1).toordinal(), date(2019, 3, 5).toordinal()]
+        np.testing.assert_array_equal(self.sequences.get_dates(), dates)
+
+    def test_median_date_of_distinct_sequences(self):
+        assert self.sequences.get_median_date_of_distinct_sequences() == date(2015, 6, 1)
+
+    def test_median_date_even_length(self):
+        self.sequences.add_initial_sequence('unique', '1', 1, date(2019, 3, 9))
+        assert self.sequences.get_median_date_of_distinct_sequences() == date(2017, 4, 17)
+
+    def test_median_date(self):
+        assert self.sequences.get_median_date() == date(2015, 6, 1)
+        self.sequences.add_initial_sequence('clone2', '1', 3, date(2010, 1, 1))
+        assert self.sequences.get_median_date() == date(2013, 9, 15)
+
+    def test_dates_updated_after_adding(self):
+        self.sequences.get_dates()
+        self.sequences.add_initial_sequence('unique', '1', 1, date(2020, 1, 1))
+        assert len(self.sequences.get_dates()) == 4
+
 
 if __name__ == '__main__':
     unittest.main()